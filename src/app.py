@@ -1,9 +1,227 @@
 """
 Gradio Web Interface for Invoice Processing Agent.
 """
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict, defaultdict
+
 import gradio as gr
 import json
-from src.graph import process_invoice
+from src.graph import get_workflow, process_invoice
+from src.models.invoice import InvoiceData
+from src.nodes.notification import get_notification_status
+from src.services.email_service import send_digest, EmailError
+from src.services.llm_service import prewarm_extraction
+from src.services.pdf_service import extract_text_from_pdf_bytes, PDFExtractionError
+
+
+# Maximum number of invoices processed at the same time
+CONCURRENCY_LIMIT = 4
+
+# Maximum number of requests waiting in the queue
+MAX_QUEUE_SIZE = 64
+
+# Maximum number of invoices of one batch processed at the same time
+BATCH_PARALLELISM = 4
+
+# Number of extracted invoices remembered by file content
+EXTRACTION_CACHE_SIZE = 128
+
+# Number of pre-extracted PDF texts kept between upload and processing
+PDF_TEXT_CACHE_SIZE = 32
+
+# Number of file content hashes remembered by path, size and mtime
+HASH_CACHE_SIZE = 256
+
+# State keys filled in by the extraction node
+EXTRACTED_FIELDS = tuple(InvoiceData.model_fields)
+
+# Extracted invoice fields and PDF texts, keyed by SHA-256 of the file
+_extraction_cache: OrderedDict[str, dict] = OrderedDict()
+_pdf_text_cache: OrderedDict[str, str] = OrderedDict()
+
+# SHA-256 digests keyed by (path, size, mtime) so each upload is hashed once
+_hash_cache: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# Status banners shown after processing
+APPROVED_HTML = """
+        <div style="padding: 20px; background-color: #d4edda; border-radius: 10px; text-align: center;">
+            <h2 style="color: #155724; margin: 0;">APPROVED</h2>
+            <p style="color: #155724; margin: 5px 0 0 0;">Invoice passed all validations</p>
+        </div>
+        """
+
+REJECTED_HTML = """
+        <div style="padding: 20px; background-color: #f8d7da; border-radius: 10px; text-align: center;">
+            <h2 style="color: #721c24; margin: 0;">REJECTED</h2>
+            <p style="color: #721c24; margin: 5px 0 0 0;">Invoice failed validation</p>
+        </div>
+        """
+
+ERROR_HTML = """
+        <div style="padding: 20px; background-color: #f8d7da; border-radius: 10px; text-align: center;">
+            <h2 style="color: #721c24; margin: 0;">ERROR</h2>
+            <p style="color: #721c24; margin: 5px 0 0 0;">Processing failed</p>
+        </div>
+        """
+
+STATUS_HTML = {
+    "approved": APPROVED_HTML,
+    "rejected": REJECTED_HTML,
+}
+
+# Invoice details panel (filled with str.format_map)
+DETAILS_TEMPLATE = """
+**Invoice Number:** {invoice_number}
+**Vendor:** {vendor_name}
+**Customer:** {customer_name}
+**Invoice Date:** {invoice_date}
+**Due Date:** {due_date}
+
+---
+
+**Subtotal:** {currency} {subtotal:,.2f}
+**Tax Rate:** {tax_rate_pct:.1f}%
+**Tax Amount:** {currency} {tax_amount:,.2f}
+**Total:** {currency} {total:,.2f}
+"""
+
+
+def _cache_get(cache: OrderedDict, key):
+    """Look up a key in an LRU cache, marking it as recently used."""
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key, value, max_size: int) -> None:
+    """Store a value in an LRU cache, evicting the oldest entry if full."""
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def file_content_hash(path: str, data: bytes | None = None) -> str:
+    """
+    Return the SHA-256 hex digest of a file's contents.
+    
+    The digest is remembered per (path, size, mtime), so the upload warm-up
+    and the later processing request hash the same file only once.
+    
+    Args:
+        path: Path to the file
+        data: File contents, if already read into memory
+    """
+    st = os.stat(path)
+    stat_key = (path, st.st_size, st.st_mtime_ns)
+    
+    digest = _cache_get(_hash_cache, stat_key)
+    if digest is None:
+        if data is not None:
+            digest = hashlib.sha256(data).hexdigest()
+        else:
+            with open(path, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+        _cache_put(_hash_cache, stat_key, digest, HASH_CACHE_SIZE)
+    
+    return digest
+
+
+def process_invoice_cached(pdf_path: str, send_notification: bool = True) -> dict:
+    """
+    Process an invoice, reusing the previous extraction for identical files.
+    
+    Re-submitting the same PDF skips PDF parsing and the LLM call, but still
+    runs validation, business rules (so the duplicate check applies) and
+    notification. Only invoices that were successfully extracted are cached,
+    so transient ingestion or LLM failures are retried on the next submission.
+    
+    Args:
+        pdf_path: Path to the invoice PDF file
+        send_notification: Send the per-invoice email
+        
+    Returns:
+        Final state dict from the workflow
+    """
+    try:
+        key = file_content_hash(pdf_path)
+    except OSError:
+        # Missing or unreadable upload: run uncached so the ingest node
+        # rejects it (and notifies) like any other unreadable PDF
+        return process_invoice(pdf_path, send_notification=send_notification)
+    
+    cached = _cache_get(_extraction_cache, key)
+    if cached is not None:
+        return process_invoice(
+            pdf_path,
+            pdf_text=cached["pdf_text"],
+            send_notification=send_notification,
+            invoice_data=cached["invoice_data"],
+        )
+    
+    # Reuse text extracted by warm_ingest while the user was on the page
+    pdf_text = _cache_get(_pdf_text_cache, key)
+    result = process_invoice(
+        pdf_path, pdf_text=pdf_text, send_notification=send_notification
+    )
+    
+    if result.get("invoice_number"):
+        extraction = {
+            "pdf_text": result["pdf_text"],
+            "invoice_data": {
+                field: result[field] for field in EXTRACTED_FIELDS if field in result
+            },
+        }
+        _cache_put(_extraction_cache, key, extraction, EXTRACTION_CACHE_SIZE)
+    
+    return result
+
+
+def _warm_ingest_sync(pdf_path: str) -> None:
+    """Extract and cache the text of a PDF ahead of processing."""
+    # Read the file once for both hashing and parsing
+    try:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        key = file_content_hash(pdf_path, pdf_bytes)
+    except OSError:
+        # The ingest node reports the error when the invoice is processed
+        return
+    
+    if _cache_get(_extraction_cache, key) is not None or _cache_get(_pdf_text_cache, key) is not None:
+        return
+    
+    try:
+        pdf_text = extract_text_from_pdf_bytes(pdf_bytes)
+    except PDFExtractionError:
+        # The ingest node reports the error when the invoice is processed
+        return
+    
+    _cache_put(_pdf_text_cache, key, pdf_text, PDF_TEXT_CACHE_SIZE)
+
+
+async def warm_ingest(file) -> None:
+    """
+    Start PDF text extraction as soon as a file is uploaded.
+    
+    Runs while the user is still on the page so that clicking
+    "Process Invoice" can skip straight to LLM extraction.
+    
+    Args:
+        file: Path of the uploaded file from Gradio
+    """
+    if file is None:
+        return
+    
+    await asyncio.to_thread(_warm_ingest_sync, file)
 
 
 def format_line_items(line_items: list[dict]) -> str:
@@ -11,15 +229,19 @@ def format_line_items(line_items: list[dict]) -> str:
     if not line_items:
         return "No line items found"
     
-    rows = []
-    for i, item in enumerate(line_items, 1):
-        rows.append(
-            f"{i}. {item.get('description', 'N/A')} | "
-            f"Qty: {item.get('quantity', 0)} | "
-            f"Unit: ${item.get('unit_price', 0):.2f} | "
-            f"Total: ${item.get('total', 0):.2f}"
-        )
-    return "\n".join(rows)
+    return "\n".join(
+        f"{i}. {item.get('description', 'N/A')} | "
+        f"Qty: {item.get('quantity', 0)} | "
+        f"Unit: ${item.get('unit_price', 0):.2f} | "
+        f"Total: ${item.get('total', 0):.2f}"
+        for i, item in enumerate(line_items, 1)
+    )
+
+
+def _get_num(r: dict, key: str) -> float:
+    """Read a numeric field, treating a missing or None value as 0."""
+    value = r[key]
+    return 0 if value is None else value
 
 
 def format_result(result: dict) -> tuple[str, str, str, str]:
@@ -29,67 +251,58 @@ def format_result(result: dict) -> tuple[str, str, str, str]:
     Returns:
         Tuple of (status_html, invoice_details, line_items, errors_or_success)
     """
-    status = result.get("status", "unknown")
+    # Bind once; missing keys read as None
+    r = defaultdict(lambda: None, result)
     
     # Status with color
-    if status == "approved":
-        status_html = """
-        <div style="padding: 20px; background-color: #d4edda; border-radius: 10px; text-align: center;">
-            <h2 style="color: #155724; margin: 0;">APPROVED</h2>
-            <p style="color: #155724; margin: 5px 0 0 0;">Invoice passed all validations</p>
-        </div>
-        """
-    else:
-        status_html = """
-        <div style="padding: 20px; background-color: #f8d7da; border-radius: 10px; text-align: center;">
-            <h2 style="color: #721c24; margin: 0;">REJECTED</h2>
-            <p style="color: #721c24; margin: 5px 0 0 0;">Invoice failed validation</p>
-        </div>
-        """
+    status_html = STATUS_HTML.get(r["status"], REJECTED_HTML)
     
     # Invoice details
-    currency = result.get("currency", "USD")
-    details = f"""
-**Invoice Number:** {result.get('invoice_number', 'N/A')}
-**Vendor:** {result.get('vendor_name', 'N/A')}
-**Customer:** {result.get('customer_name', 'N/A')}
-**Invoice Date:** {result.get('invoice_date', 'N/A')}
-**Due Date:** {result.get('due_date', 'N/A')}
-
----
-
-**Subtotal:** {currency} {result.get('subtotal', 0):,.2f}
-**Tax Rate:** {(result.get('tax_rate', 0) or 0) * 100:.1f}%
-**Tax Amount:** {currency} {result.get('tax_amount', 0):,.2f}
-**Total:** {currency} {result.get('total', 0):,.2f}
-"""
+    details = DETAILS_TEMPLATE.format_map({
+        "invoice_number": r["invoice_number"] or "N/A",
+        "vendor_name": r["vendor_name"] or "N/A",
+        "customer_name": r["customer_name"] or "N/A",
+        "invoice_date": r["invoice_date"] or "N/A",
+        "due_date": r["due_date"] or "N/A",
+        "currency": r["currency"] or "USD",
+        "subtotal": _get_num(r, "subtotal"),
+        "tax_rate_pct": _get_num(r, "tax_rate") * 100,
+        "tax_amount": _get_num(r, "tax_amount"),
+        "total": _get_num(r, "total"),
+    })
     
     # Line items
-    line_items = format_line_items(result.get("line_items", []))
+    line_items = format_line_items(r["line_items"] or [])
     
     # Errors or success message
-    errors = result.get("errors", [])
-    notification_sent = result.get("notification_sent", False)
+    errors = r["errors"] or []
+    notification_sent = r["notification_sent"]
     
     if errors:
-        errors_text = "**Issues Found:**\n\n" + "\n".join([f"- {e}" for e in errors])
+        errors_text = "**Issues Found:**\n\n" + "\n".join(f"- {e}" for e in errors)
     else:
         errors_text = "**All Checks Passed**\n\nNo issues found with this invoice."
     
     if notification_sent:
-        errors_text += "\n\n---\n\n*Email notification sent successfully.*"
-    elif result.get("notification_error"):
-        errors_text += f"\n\n---\n\n*Email notification failed: {result.get('notification_error')}*"
+        delivery = get_notification_status(r["notification_id"] or "")
+        if delivery == "sent":
+            errors_text += "\n\n---\n\n*Email notification sent successfully.*"
+        elif delivery and delivery.startswith("failed: "):
+            errors_text += f"\n\n---\n\n*Email notification failed: {delivery.removeprefix('failed: ')}*"
+        else:
+            errors_text += "\n\n---\n\n*Email notification queued for delivery.*"
+    elif r["notification_error"]:
+        errors_text += f"\n\n---\n\n*Email notification failed: {r['notification_error']}*"
     
     return status_html, details, line_items, errors_text
 
 
-def process_uploaded_invoice(file) -> tuple[str, str, str, str]:
+async def process_uploaded_invoice(file) -> tuple[str, str, str, str]:
     """
     Process an uploaded invoice file.
     
     Args:
-        file: Uploaded file object from Gradio
+        file: Path of the uploaded file from Gradio
         
     Returns:
         Tuple of formatted results for display
@@ -104,27 +317,119 @@ def process_uploaded_invoice(file) -> tuple[str, str, str, str]:
         )
     
     try:
-        # Process the invoice through the workflow
-        result = process_invoice(file.name)
+        # Process the invoice through the workflow (off the event loop)
+        result = await asyncio.to_thread(process_invoice_cached, file)
         
         # Format and return results
         return format_result(result)
         
     except Exception as e:
-        error_html = f"""
-        <div style="padding: 20px; background-color: #f8d7da; border-radius: 10px; text-align: center;">
-            <h2 style="color: #721c24; margin: 0;">ERROR</h2>
-            <p style="color: #721c24; margin: 5px 0 0 0;">Processing failed</p>
-        </div>
-        """
         return (
-            error_html,
+            ERROR_HTML,
             "Error occurred during processing",
             "N/A",
             f"**Error:** {str(e)}"
         )
 
 
+def format_batch_results(results: list[tuple[str, dict | Exception]]) -> str:
+    """
+    Format the results of a batch run as a Markdown summary table.
+    
+    Args:
+        results: List of (file_name, final_state_or_exception) pairs
+        
+    Returns:
+        Markdown table with one row per invoice
+    """
+    if not results:
+        return "No files uploaded"
+    
+    rows = [
+        "| File | Invoice Number | Vendor | Total | Status | Issues |",
+        "|---|---|---|---|---|---|",
+    ]
+    for file_name, result in results:
+        if isinstance(result, Exception):
+            rows.append(f"| {file_name} | N/A | N/A | N/A | ERROR | {result} |")
+            continue
+        currency = result.get("currency", "USD")
+        rows.append(
+            f"| {file_name} | {result.get('invoice_number', 'N/A')} | "
+            f"{result.get('vendor_name', 'N/A')} | "
+            f"{currency} {result.get('total', 0) or 0:,.2f} | "
+            f"{result.get('status', 'unknown').upper()} | "
+            f"{len(result.get('errors', []))} |"
+        )
+    
+    approved = sum(
+        1 for _, r in results if not isinstance(r, Exception) and r.get("status") == "approved"
+    )
+    rows.append("")
+    rows.append(f"**{approved} of {len(results)} invoices approved.**")
+    return "\n".join(rows)
+
+
+async def process_uploaded_batch(files) -> str:
+    """
+    Process several uploaded invoice files concurrently.
+    
+    Each invoice runs through the workflow in its own worker thread, so the
+    LLM extraction calls of the batch overlap instead of running one by one.
+    A single digest email summarizes the batch instead of one email per invoice.
+    Cached extractions are shared with single uploads, but the business
+    rules and the notification decision run fresh for every submission, so
+    a batch never suppresses a later single-upload email and a re-submitted
+    batch reports its invoices as duplicates.
+    
+    Args:
+        files: List of uploaded file paths from Gradio
+        
+    Returns:
+        Markdown summary of the batch
+    """
+    if not files:
+        return "Upload one or more PDF files to begin batch processing"
+    
+    semaphore = asyncio.Semaphore(BATCH_PARALLELISM)
+    
+    async def run(path: str) -> dict | Exception:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(
+                    process_invoice_cached, path, send_notification=False
+                )
+            except Exception as e:
+                return e
+    
+    outcomes = await asyncio.gather(*(run(path) for path in files))
+    
+    summary = format_batch_results(
+        [(os.path.basename(path), outcome) for path, outcome in zip(files, outcomes)]
+    )
+    
+    states = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+    if states:
+        try:
+            await asyncio.to_thread(send_digest, states)
+            summary += "\n\n*Digest email sent successfully.*"
+        except EmailError as e:
+            summary += f"\n\n*Digest email failed: {e}*"
+    
+    return summary
+
+
+def warmup() -> None:
+    """
+    Pay one-off startup costs before the first request arrives.
+    
+    Compiles the LangGraph workflow and builds the cached LLM extraction
+    chain so the first invoice does not wait for them.
+    """
+    get_workflow()
+    prewarm_extraction()
+
+
 # Create the Gradio interface
 def create_app():
     """Create and configure the Gradio application."""
@@ -190,6 +495,22 @@ def create_app():
         gr.Markdown("### Validation Results")
         errors_output = gr.Markdown("Upload an invoice to see validation results")
         
+        gr.Markdown("---")
+        
+        # Batch processing
+        with gr.Accordion("Batch Processing", open=False):
+            batch_input = gr.File(
+                label="Select PDF Invoices",
+                file_types=[".pdf"],
+                file_count="multiple",
+                type="filepath",
+            )
+            batch_btn = gr.Button(
+                "Process Batch",
+                variant="secondary",
+            )
+            batch_output = gr.Markdown("Upload several invoices to process them together")
+        
         # Footer
         gr.Markdown("""
         ---
@@ -200,11 +521,26 @@ def create_app():
         *Built with LangChain, LangGraph, and Gradio*
         """)
         
+        # Extract PDF text in the background as soon as a file is uploaded
+        file_input.upload(
+            fn=warm_ingest,
+            inputs=[file_input],
+            outputs=None,
+        )
+        
         # Connect the button to the processing function
         process_btn.click(
             fn=process_uploaded_invoice,
             inputs=[file_input],
             outputs=[status_output, details_output, line_items_output, errors_output],
+            concurrency_limit=CONCURRENCY_LIMIT,
+        )
+        
+        batch_btn.click(
+            fn=process_uploaded_batch,
+            inputs=[batch_input],
+            outputs=[batch_output],
+            concurrency_limit=1,
         )
     
     return app
@@ -212,8 +548,14 @@ def create_app():
 
 # Main entry point
 if __name__ == "__main__":
+    # Warm up in the background while Gradio starts its server
+    threading.Thread(target=warmup, daemon=True).start()
+    
     app = create_app()
-    app.launch(
+    app.queue(
+        default_concurrency_limit=CONCURRENCY_LIMIT,
+        max_size=MAX_QUEUE_SIZE,
+    ).launch(
         server_name="0.0.0.0",  # Allow external access
         server_port=7860,
         share=False,  # Set to True to create a public link
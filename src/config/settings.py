@@ -11,9 +11,17 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
 
+# LLM extraction cache (set LLM_CACHE_DISABLED=1 to always call the API)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite3")
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
 # Gmail SMTP Configuration
 GMAIL_ADDRESS = os.getenv("GMAIL_ADDRESS")
 GMAIL_APP_PASSWORD = os.getenv("GMAIL_APP_PASSWORD")
 
 # Notification Settings
 NOTIFICATION_EMAIL = os.getenv("NOTIFICATION_EMAIL")
+
+# PDF Processing
+# "pdfium" (fast native extraction) or "pdfplumber" (layout-aware fallback)
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfium")
@@ -1,6 +1,8 @@
 """
 LangGraph Workflow Definition - Wires all nodes together.
 """
+from functools import lru_cache
+
 from langgraph.graph import StateGraph, START, END
 
 from src.state import InvoiceState
@@ -11,6 +13,18 @@ from src.nodes.business_rules import business_rules_node
 from src.nodes.notification import notification_node
 
 
+def route_after_ingest(state: InvoiceState) -> str:
+    """Skip straight to notification if the PDF could not be read."""
+    return "notification" if state.get("errors") else "extraction"
+
+
+def route_after_extraction(state: InvoiceState) -> str | list[str]:
+    """Skip validation if extraction failed, otherwise run both checks in parallel."""
+    if state.get("errors"):
+        return "notification"
+    return ["validation", "business_rules"]
+
+
 def create_invoice_workflow() -> StateGraph:
     """
     Create and compile the invoice processing workflow.
@@ -30,10 +44,20 @@ def create_invoice_workflow() -> StateGraph:
     
     # ADD EDGES
     builder.add_edge(START, "ingest")
-    builder.add_edge("ingest", "extraction")
-    builder.add_edge("extraction", "validation")
-    builder.add_edge("validation", "business_rules")
-    builder.add_edge("business_rules", "notification")
+    # Failed ingestion/extraction goes directly to notification (no wasted LLM call)
+    builder.add_conditional_edges(
+        "ingest",
+        route_after_ingest,
+        ["extraction", "notification"],
+    )
+    # Validation and business rules are independent, so they run in parallel
+    builder.add_conditional_edges(
+        "extraction",
+        route_after_extraction,
+        ["validation", "business_rules", "notification"],
+    )
+    # Notification waits for both branches; their errors merge via the 'add' reducer
+    builder.add_edge(["validation", "business_rules"], "notification")
     builder.add_edge("notification", END)
     
     # COMPILE
@@ -42,24 +66,40 @@ def create_invoice_workflow() -> StateGraph:
     return workflow
 
 
-def process_invoice(pdf_path: str) -> dict:
+def process_invoice(
+    pdf_path: str,
+    pdf_text: str | None = None,
+    send_notification: bool = True,
+    invoice_data: dict | None = None,
+) -> dict:
     """
     Process an invoice PDF through the complete workflow
     
     Args:
         pdf_path: Path to the invoice PDF file
+        pdf_text: Text already extracted from the PDF, if available
+        send_notification: Send the per-invoice email (False for batch runs
+            that send a single digest instead)
+        invoice_data: Fields already extracted from the same file, if
+            available (skips the LLM call; validation, business rules and
+            notification still run)
         
     Returns:
         Final state dict with all extracted data and processing results
     """
-    # Create the workflow
-    workflow = create_invoice_workflow()
+    # Reuse the compiled workflow
+    workflow = get_workflow()
     
     # Initial state
     initial_state = {
         "pdf_path": pdf_path,
         "errors": [],  # Initialize empty errors list 
+        "send_notification": send_notification,
     }
+    if pdf_text:
+        initial_state["pdf_text"] = pdf_text
+    if invoice_data:
+        initial_state.update(invoice_data)
     
     # Invoke the workflow
     final_state = workflow.invoke(initial_state)
@@ -67,18 +107,14 @@ def process_invoice(pdf_path: str) -> dict:
     return final_state
 
 
-# Create a singleton workflow instance for reuse
-_workflow_instance = None
-
-
+@lru_cache(maxsize=1)
 def get_workflow():
     """
     Get or create the workflow instance (singleton pattern).
     
+    The graph is compiled once per process and shared by all requests.
+    
     Returns:
         Compiled LangGraph workflow
     """
-    global _workflow_instance
-    if _workflow_instance is None:
-        _workflow_instance = create_invoice_workflow()
-    return _workflow_instance
+    return create_invoice_workflow()
@@ -97,19 +97,8 @@ class InvoiceData(BaseModel):
     def to_state_dict(self) -> dict:
         """
         Convert to dictionary format matching InvoiceState fields.
+        
+        Field names match the state keys, so a single model_dump() also
+        serializes the nested line items.
         """
-        return {
-            "invoice_number": self.invoice_number,
-            "vendor_name": self.vendor_name,
-            "vendor_address": self.vendor_address,
-            "customer_name": self.customer_name,
-            "customer_address": self.customer_address,
-            "invoice_date": self.invoice_date,
-            "due_date": self.due_date,
-            "line_items": [item.model_dump() for item in self.line_items],
-            "subtotal": self.subtotal,
-            "tax_rate": self.tax_rate,
-            "tax_amount": self.tax_amount,
-            "total": self.total,
-            "currency": self.currency,
-        }
+        return self.model_dump()
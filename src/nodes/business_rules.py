@@ -1,7 +1,11 @@
 """
 Business Rules Node - Validates invoice against business policies.
 """
-from datetime import datetime, timedelta
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
 from src.state import InvoiceState
 
 
@@ -27,9 +31,21 @@ REQUIRED_FIELDS = [
     "total",
 ]
 
-# Simple in-memory store for duplicate detection
+# Maximum number of invoices remembered for duplicate detection
+DUPLICATE_STORE_MAX_SIZE = 100_000
+
+# How long (in seconds) a processed invoice is remembered
+DUPLICATE_STORE_TTL_SECONDS = 86_400
+
+# Simple in-memory store for duplicate detection (key -> registration time)
+# Keys are 64-bit fingerprints rather than full strings to keep entries small.
 # In production, this would be a database lookup
-_processed_invoices: set[str] = set()
+_processed_invoices: OrderedDict[int, float] = OrderedDict()
+_processed_invoices_lock = threading.Lock()
+
+# Accepted invoice date range as (today, max_future, max_past) ordinals,
+# recomputed when the day changes
+_date_bounds: tuple[int, int, int] | None = None
 
 
 def business_rules_node(state: InvoiceState) -> dict:
@@ -71,13 +87,11 @@ def business_rules_node(state: InvoiceState) -> dict:
     invoice_number = state.get("invoice_number")
     vendor_name = state.get("vendor_name")
     if invoice_number and vendor_name:
-        if is_duplicate_invoice(invoice_number, vendor_name):
+        # Registers the invoice for future duplicate detection if it is new
+        if check_and_register_invoice(invoice_number, vendor_name):
             errors.append(
                 f"Duplicate invoice detected: {invoice_number} from {vendor_name}"
             )
-        else:
-            # Register this invoice (for future duplicate detection)
-            register_invoice(invoice_number, vendor_name)
     
     # Determine if business rules pass
     business_rules_valid = len(errors) == 0
@@ -116,26 +130,40 @@ def check_amount_limits(total: float) -> list[str]:
     return errors
 
 
+def _get_date_bounds() -> tuple[int, int]:
+    """Return the (max_future, max_past) date ordinals for today."""
+    global _date_bounds
+    today = date.today().toordinal()
+    bounds = _date_bounds
+    if bounds is None or bounds[0] != today:
+        bounds = (today, today + MAX_FUTURE_DAYS, today - MAX_PAST_DAYS)
+        _date_bounds = bounds
+    return bounds[1], bounds[2]
+
+
 def check_invoice_date(invoice_date: str) -> list[str]:
     """Check if invoice date is within acceptable range."""
     errors = []
     
     try:
-        # Parse date (expecting YYYY-MM-DD format)
-        parsed_date = datetime.strptime(invoice_date, "%Y-%m-%d")
-        today = datetime.now()
+        # Parse date (expecting YYYY-MM-DD format). fromisoformat is only used
+        # for the canonical zero-padded form since it also accepts "20240115"
+        # and week dates; strptime handles the rest (e.g. "2024-1-5")
+        if len(invoice_date) == 10 and invoice_date[4] == invoice_date[7] == "-":
+            parsed = date.fromisoformat(invoice_date).toordinal()
+        else:
+            parsed = datetime.strptime(invoice_date, "%Y-%m-%d").toordinal()
+        max_future, max_past = _get_date_bounds()
         
         # Check if too far in the future
-        max_future = today + timedelta(days=MAX_FUTURE_DAYS)
-        if parsed_date > max_future:
+        if parsed > max_future:
             errors.append(
                 f"Invoice date {invoice_date} is too far in the future "
                 f"(max {MAX_FUTURE_DAYS} days ahead)"
             )
         
         # Check if too old
-        max_past = today - timedelta(days=MAX_PAST_DAYS)
-        if parsed_date < max_past:
+        if parsed < max_past:
             errors.append(
                 f"Invoice date {invoice_date} is too old "
                 f"(max {MAX_PAST_DAYS} days in the past)"
@@ -149,6 +177,52 @@ def check_invoice_date(invoice_date: str) -> list[str]:
     return errors
 
 
+def _invoice_key(invoice_number: str, vendor_name: str) -> int:
+    """
+    Build the case-insensitive duplicate detection key for an invoice.
+    
+    The key is a 64-bit BLAKE2b fingerprint; at the store's maximum size the
+    chance of a false duplicate is below one in a billion.
+    """
+    name = f"{vendor_name}:{invoice_number}".casefold().encode()
+    return int.from_bytes(hashlib.blake2b(name, digest_size=8).digest(), "little")
+
+
+def _evict_stale_invoices(now: float) -> None:
+    """
+    Drop expired entries and trim the store to its maximum size.
+    
+    Entries are kept in registration order, so the oldest are evicted first.
+    Must be called with _processed_invoices_lock held.
+    """
+    cutoff = now - DUPLICATE_STORE_TTL_SECONDS
+    while _processed_invoices:
+        registered_at = next(iter(_processed_invoices.values()))
+        if registered_at >= cutoff and len(_processed_invoices) <= DUPLICATE_STORE_MAX_SIZE:
+            break
+        _processed_invoices.popitem(last=False)
+
+
+def check_and_register_invoice(invoice_number: str, vendor_name: str) -> bool:
+    """
+    Atomically check for a duplicate and register the invoice if it is new.
+    
+    Note: This is a simplified in-memory check for demo purposes.
+    In production, this would be a database upsert.
+    
+    Returns:
+        True if the invoice was already processed, False otherwise
+    """
+    key = _invoice_key(invoice_number, vendor_name)
+    now = time.monotonic()
+    with _processed_invoices_lock:
+        _evict_stale_invoices(now)
+        if key in _processed_invoices:
+            return True
+        _processed_invoices[key] = now
+        return False
+
+
 def is_duplicate_invoice(invoice_number: str, vendor_name: str) -> bool:
     """
     Check if this invoice has already been processed.
@@ -156,8 +230,10 @@ def is_duplicate_invoice(invoice_number: str, vendor_name: str) -> bool:
     Note: This is a simplified in-memory check for demo purposes.
     In production, this would query a database.
     """
-    key = f"{vendor_name}:{invoice_number}".lower()
-    return key in _processed_invoices
+    key = _invoice_key(invoice_number, vendor_name)
+    with _processed_invoices_lock:
+        _evict_stale_invoices(time.monotonic())
+        return key in _processed_invoices
 
 
 def register_invoice(invoice_number: str, vendor_name: str) -> None:
@@ -166,13 +242,17 @@ def register_invoice(invoice_number: str, vendor_name: str) -> None:
     
     Note: In production, this would insert into a database.
     """
-    key = f"{vendor_name}:{invoice_number}".lower()
-    _processed_invoices.add(key)
+    key = _invoice_key(invoice_number, vendor_name)
+    with _processed_invoices_lock:
+        _processed_invoices[key] = time.monotonic()
+        _processed_invoices.move_to_end(key)
+        _evict_stale_invoices(_processed_invoices[key])
 
 
 def clear_processed_invoices() -> None:
     """
-    Clear the processed invoices set.
+    Clear the processed invoices store.
     Useful for testing or resetting state.
     """
-    _processed_invoices.clear()
+    with _processed_invoices_lock:
+        _processed_invoices.clear()
@@ -10,7 +10,8 @@ def extraction_node(state: InvoiceState) -> dict:
     Extract structured invoice data from raw text using LLM.
     
     Args:
-        state: Current workflow state with pdf_text set
+        state: Current workflow state with pdf_text (and optionally the
+            extracted invoice fields) set
         
     Returns:
         Dict with state updates
@@ -23,6 +24,12 @@ def extraction_node(state: InvoiceState) -> dict:
             "errors": ["Extraction Error: No PDF text available. Ingestion may have failed."]
         }
     
+    # Invoice data may already have been extracted from the same file earlier
+    if state.get("invoice_number"):
+        return {
+            "invoice_number": state["invoice_number"]
+        }
+    
     try:
         # Call LLM to extract structured data
         invoice_data = extract_invoice_data(pdf_text)
@@ -4,25 +4,79 @@ Ingest Node - First node in the workflow.
 This node receives the PDF path from the state and extracts the text content.
 It's the entry point of the processing pipeline.
 """
+import os
+import threading
+from collections import OrderedDict
+
 from src.state import InvoiceState
 from src.services.pdf_service import extract_text_from_pdf, PDFExtractionError
 
 
+# Number of extracted PDF texts kept in memory
+INGEST_CACHE_SIZE = 128
+
+# Extracted text keyed by (path, size, mtime) so changed files are re-read
+_ingest_cache: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+_ingest_cache_lock = threading.Lock()
+
+
+def extract_text_cached(pdf_path: str) -> str:
+    """
+    Extract text from a PDF, reusing the result for an unchanged file.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        
+    Returns:
+        Extracted text
+        
+    Raises:
+        PDFExtractionError: If the PDF cannot be read or has no text
+    """
+    try:
+        st = os.stat(pdf_path)
+    except OSError:
+        # Let the PDF service report the missing file
+        return extract_text_from_pdf(pdf_path)
+    
+    key = (pdf_path, st.st_size, st.st_mtime_ns)
+    with _ingest_cache_lock:
+        pdf_text = _ingest_cache.get(key)
+        if pdf_text is not None:
+            _ingest_cache.move_to_end(key)
+            return pdf_text
+    
+    pdf_text = extract_text_from_pdf(pdf_path)
+    
+    with _ingest_cache_lock:
+        _ingest_cache[key] = pdf_text
+        if len(_ingest_cache) > INGEST_CACHE_SIZE:
+            _ingest_cache.popitem(last=False)
+    
+    return pdf_text
+
+
 def ingest_node(state: InvoiceState) -> dict:
     """
     Extract text from the uploaded PDF invoice.
     
     Args:
-        state: Current workflow state with pdf_path set
+        state: Current workflow state with pdf_path (and optionally pdf_text) set
         
     Returns:
         Dict with state updates
     """
     pdf_path = state["pdf_path"]
     
+    # Text may already have been extracted when the file was uploaded
+    if state.get("pdf_text"):
+        return {
+            "pdf_text": state["pdf_text"]
+        }
+    
     try:
-        # Extract text from PDF
-        pdf_text = extract_text_from_pdf(pdf_path)
+        # Extract text from PDF (cached for unchanged files)
+        pdf_text = extract_text_cached(pdf_path)
         
         # Return state update with extracted text
         return {
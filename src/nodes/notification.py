@@ -1,15 +1,63 @@
 """
 Notification Node - Sends email notifications about invoice processing results.
 """
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
 from src.state import InvoiceState
 from src.services.email_service import (
-    send_email,
+    send_email_async,
     create_approval_email,
     create_rejection_email,
     EmailError,
 )
 
 
+# Number of delivery statuses kept for polling
+MAX_TRACKED_NOTIFICATIONS = 1000
+
+# Delivery status per notification id: "pending", "sent" or "failed: <reason>"
+_notification_status: OrderedDict[str, str] = OrderedDict()
+_notification_status_lock = threading.Lock()
+
+
+def _set_notification_status(notification_id: str, status: str) -> None:
+    """Record the delivery status of a notification."""
+    with _notification_status_lock:
+        _notification_status[notification_id] = status
+        if len(_notification_status) > MAX_TRACKED_NOTIFICATIONS:
+            _notification_status.popitem(last=False)
+
+
+def _on_email_done(notification_id: str, future: Future) -> None:
+    """Record the outcome of a background email send."""
+    error = future.exception()
+    if error is None:
+        _set_notification_status(notification_id, "sent")
+    elif isinstance(error, EmailError):
+        _set_notification_status(notification_id, f"failed: {error}")
+    else:
+        _set_notification_status(
+            notification_id, f"failed: Unexpected error sending notification: {error}"
+        )
+
+
+def get_notification_status(notification_id: str) -> str | None:
+    """
+    Get the delivery status of a background notification.
+    
+    Args:
+        notification_id: Id stored in the state by notification_node
+        
+    Returns:
+        "pending", "sent", "failed: <reason>", or None if unknown
+    """
+    with _notification_status_lock:
+        return _notification_status.get(notification_id)
+
+
 def notification_node(state: InvoiceState) -> dict:
     """
     Determine final status and send email notification.
@@ -41,15 +89,30 @@ def notification_node(state: InvoiceState) -> dict:
     if not is_approved:
         result["rejection_reasons"] = errors
     
-    # Create and send email
+    # Batch runs send one digest email instead (see send_digest)
+    if not state.get("send_notification", True):
+        return result
+    
+    # Create the email and send it in the background
     try:
         if is_approved:
             subject, body = create_approval_email(state)
         else:
             subject, body = create_rejection_email(state)
         
-        send_email(subject, body)
+        notification_id = uuid.uuid4().hex
+        _set_notification_status(notification_id, "pending")
+        # Sent by the email service's background worker so SMTP latency
+        # stays off the workflow's critical path
+        future = send_email_async(subject, body)
+        future.add_done_callback(
+            lambda f: _on_email_done(notification_id, f)
+        )
+        
+        # Reported optimistically; delivery can be checked with
+        # get_notification_status(notification_id)
         result["notification_sent"] = True
+        result["notification_id"] = notification_id
         
     except EmailError as e:
         result["notification_error"] = str(e)
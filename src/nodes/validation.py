@@ -33,12 +33,18 @@ def validation_node(state: InvoiceState) -> dict:
     tax_amount = state.get("tax_amount")
     total = state.get("total")
     
+    # Format the total once here; every email template reuses this string
+    display = {}
+    if total is not None:
+        display["total_display"] = format(total, ",.2f")
+    
     # Check if we have the minimum required data
     if not line_items:
         errors.append("Validation Error: No line items found in invoice")
         return {
             "calculations_valid": False,
-            "errors": errors
+            "errors": errors,
+            **display,
         }
     
     # 1. Validate each line item total
@@ -89,5 +95,6 @@ def validation_node(state: InvoiceState) -> dict:
     
     return {
         "calculations_valid": calculations_valid,
-        "errors": errors  # Will be accumulated via the 'add' reducer
+        "errors": errors,  # Will be accumulated via the 'add' reducer
+        **display,
     }
@@ -1,18 +1,144 @@
 """
 Email Service - Send notifications via Gmail SMTP.
 """
+import atexit
+import html
+import queue
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import ssl
+import string
+import threading
+from concurrent.futures import Future
+from email.message import EmailMessage
 
 from src.config.settings import GMAIL_ADDRESS, GMAIL_APP_PASSWORD, NOTIFICATION_EMAIL
 
 
+# Gmail SMTP server
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+
+# Socket timeout in seconds, so a silently dropped connection fails fast
+# (and is replaced) instead of blocking the email worker
+SMTP_TIMEOUT = 30
+
+# TLS context built once; loading the system CA store on every connect is costly
+_SSL_CTX = ssl.create_default_context()
+
+# Messages sent over one connection before it is replaced
+# (keeps us under Gmail's per-connection message limits)
+MAX_MESSAGES_PER_CONNECTION = 100
+
+# Persistent SMTP connection shared by all senders, guarded by _smtp_lock
+_smtp_conn: smtplib.SMTP_SSL | None = None
+_smtp_sent = 0
+_smtp_lock = threading.Lock()
+
+# Seconds to wait for queued emails to go out when the process exits
+EMAIL_FLUSH_TIMEOUT = 30
+
+# Background delivery queue drained by a single worker thread, so all sends
+# share the persistent connection in order (Gmail-friendly)
+_email_queue: queue.Queue = queue.Queue()
+_email_worker: threading.Thread | None = None
+_email_worker_lock = threading.Lock()
+
+
 class EmailError(Exception):
     """Raised when email sending fails."""
     pass
 
 
+def _reset_smtp() -> None:
+    """Close and forget the current connection. Must be called with _smtp_lock held."""
+    global _smtp_conn, _smtp_sent
+    if _smtp_conn is not None:
+        try:
+            _smtp_conn.quit()
+        except Exception:
+            _smtp_conn.close()
+    _smtp_conn = None
+    _smtp_sent = 0
+
+
+def _get_smtp() -> smtplib.SMTP_SSL:
+    """
+    Return a logged-in SMTP connection, reusing the existing one if healthy.
+    
+    Must be called with _smtp_lock held.
+    """
+    global _smtp_conn
+    
+    if _smtp_conn is not None and _smtp_sent >= MAX_MESSAGES_PER_CONNECTION:
+        _reset_smtp()
+    
+    if _smtp_conn is not None:
+        try:
+            if _smtp_conn.noop()[0] != 250:
+                _reset_smtp()
+        except (smtplib.SMTPException, OSError):
+            # Dead or timed-out connection: close it without waiting on QUIT
+            _smtp_conn.close()
+            _reset_smtp()
+    
+    if _smtp_conn is None:
+        server = smtplib.SMTP_SSL(
+            SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT, context=_SSL_CTX
+        )
+        try:
+            server.login(GMAIL_ADDRESS, GMAIL_APP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        _smtp_conn = server
+    
+    return _smtp_conn
+
+
+def _send_message(message: EmailMessage) -> None:
+    """Send a message over the shared connection, reconnecting once if it dropped."""
+    global _smtp_sent
+    with _smtp_lock:
+        try:
+            _get_smtp().send_message(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            _reset_smtp()
+            _get_smtp().send_message(message)
+        except Exception:
+            # Connection state is unknown after a failed transaction
+            _reset_smtp()
+            raise
+        _smtp_sent += 1
+
+
+@atexit.register
+def _close_smtp() -> None:
+    """Close the shared SMTP connection on interpreter exit."""
+    with _smtp_lock:
+        _reset_smtp()
+
+
+def _check_email_config(to_email: str | None) -> str:
+    """
+    Validate the Gmail configuration and return the recipient.
+    
+    Raises:
+        EmailError: If the sender credentials or the recipient are missing
+    """
+    # Use default recipient if not specified
+    recipient = to_email or NOTIFICATION_EMAIL
+    
+    # Validate configuration
+    if not GMAIL_ADDRESS:
+        raise EmailError("GMAIL_ADDRESS not configured")
+    if not GMAIL_APP_PASSWORD:
+        raise EmailError("GMAIL_APP_PASSWORD not configured")
+    if not recipient:
+        raise EmailError("No recipient email specified")
+    
+    return recipient
+
+
 def send_email(subject: str, body: str, to_email: str | None = None) -> bool:
     """
     Send an email notification via Gmail SMTP.
@@ -28,32 +154,20 @@ def send_email(subject: str, body: str, to_email: str | None = None) -> bool:
     Raises:
         EmailError: If email sending fails
     """
-    # Use default recipient if not specified
-    recipient = to_email or NOTIFICATION_EMAIL
-    
-    # Validate configuration
-    if not GMAIL_ADDRESS:
-        raise EmailError("GMAIL_ADDRESS not configured")
-    if not GMAIL_APP_PASSWORD:
-        raise EmailError("GMAIL_APP_PASSWORD not configured")
-    if not recipient:
-        raise EmailError("No recipient email specified")
+    recipient = _check_email_config(to_email)
     
     try:
         # Create message
-        message = MIMEMultipart("alternative")
+        message = EmailMessage()
         message["Subject"] = subject
         message["From"] = GMAIL_ADDRESS
         message["To"] = recipient
         
-        # Attach HTML body
-        html_part = MIMEText(body, "html")
-        message.attach(html_part)
+        # HTML body
+        message.set_content(body, subtype="html")
         
-        # Connect to Gmail SMTP server and send
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(GMAIL_ADDRESS, GMAIL_APP_PASSWORD)
-            server.sendmail(GMAIL_ADDRESS, recipient, message.as_string())
+        # Send over the persistent Gmail SMTP connection
+        _send_message(message)
         
         return True
         
@@ -68,24 +182,76 @@ def send_email(subject: str, body: str, to_email: str | None = None) -> bool:
         raise EmailError(f"Failed to send email: {e}")
 
 
-def create_approval_email(state: dict) -> tuple[str, str]:
+def _email_worker_loop() -> None:
+    """Send queued emails one at a time, reporting each outcome on its future."""
+    while True:
+        subject, body, to_email, future = _email_queue.get()
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(send_email(subject, body, to_email))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            _email_queue.task_done()
+
+
+def send_email_async(subject: str, body: str, to_email: str | None = None) -> Future:
     """
-    Create email content for an approved invoice.
+    Queue an email for background delivery and return immediately.
     
     Args:
-        state: Invoice state with extracted data
+        subject: Email subject line
+        body: Email body (HTML supported)
+        to_email: Recipient email
         
     Returns:
-        Tuple of (subject, body)
+        Future resolving to True once sent, or raising EmailError on failure
+        
+    Raises:
+        EmailError: If Gmail is not configured (checked before queueing)
     """
-    invoice_number = state.get("invoice_number", "Unknown")
-    vendor_name = state.get("vendor_name", "Unknown")
-    total = state.get("total", 0)
-    currency = state.get("currency", "USD")
+    global _email_worker
     
-    subject = f"Invoice Approved: {invoice_number} from {vendor_name}"
+    # Configuration errors are reported to the caller, not on the future
+    _check_email_config(to_email)
+    
+    with _email_worker_lock:
+        if _email_worker is None:
+            _email_worker = threading.Thread(
+                target=_email_worker_loop, name="email-worker", daemon=True
+            )
+            _email_worker.start()
+    
+    future = Future()
+    _email_queue.put((subject, body, to_email, future))
+    return future
+
+
+def flush_emails(timeout: float | None = None) -> bool:
+    """
+    Wait until all queued emails have been processed.
     
-    body = f"""
+    Args:
+        timeout: Maximum seconds to wait (None waits indefinitely)
+        
+    Returns:
+        True if the queue drained, False if the timeout expired first
+    """
+    with _email_queue.all_tasks_done:
+        return _email_queue.all_tasks_done.wait_for(
+            lambda: not _email_queue.unfinished_tasks, timeout
+        )
+
+
+@atexit.register
+def _flush_emails_at_exit() -> None:
+    """Give queued emails a chance to go out before the process exits."""
+    flush_emails(timeout=EMAIL_FLUSH_TIMEOUT)
+
+
+# Email body templates, parsed once at import time
+_APPROVAL_TMPL = string.Template("""
     <html>
     <body style="font-family: Arial, sans-serif; padding: 20px;">
         <h2 style="color: #28a745;">Invoice Approved</h2>
@@ -93,15 +259,15 @@ def create_approval_email(state: dict) -> tuple[str, str]:
         <table style="border-collapse: collapse; width: 100%; max-width: 500px;">
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Invoice Number:</strong></td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{invoice_number}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">$invoice_number</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Vendor:</strong></td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{vendor_name}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">$vendor_name</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Total Amount:</strong></td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{currency} {total:,.2f}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">$currency $total_fmt</td>
             </tr>
             <tr>
                 <td style="padding: 10px;"><strong>Status:</strong></td>
@@ -114,33 +280,9 @@ def create_approval_email(state: dict) -> tuple[str, str]:
         </p>
     </body>
     </html>
-    """
-    
-    return subject, body
+    """)
 
-
-def create_rejection_email(state: dict) -> tuple[str, str]:
-    """
-    Create email content for a rejected invoice.
-    
-    Args:
-        state: Invoice state with extracted data and errors
-        
-    Returns:
-        Tuple of (subject, body)
-    """
-    invoice_number = state.get("invoice_number", "Unknown")
-    vendor_name = state.get("vendor_name", "Unknown")
-    total = state.get("total", 0)
-    currency = state.get("currency", "USD")
-    errors = state.get("errors", [])
-    
-    subject = f"Invoice Rejected: {invoice_number} from {vendor_name}"
-    
-    # Format errors as HTML list
-    errors_html = "".join([f"<li style='margin: 5px 0;'>{error}</li>" for error in errors])
-    
-    body = f"""
+_REJECTION_TMPL = string.Template("""
     <html>
     <body style="font-family: Arial, sans-serif; padding: 20px;">
         <h2 style="color: #dc3545;">Invoice Rejected</h2>
@@ -148,15 +290,15 @@ def create_rejection_email(state: dict) -> tuple[str, str]:
         <table style="border-collapse: collapse; width: 100%; max-width: 500px;">
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Invoice Number:</strong></td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{invoice_number}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">$invoice_number</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Vendor:</strong></td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{vendor_name}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">$vendor_name</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #ddd;"><strong>Total Amount:</strong></td>
-                <td style="padding: 10px; border-bottom: 1px solid #ddd;">{currency} {total:,.2f}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #ddd;">$currency $total_fmt</td>
             </tr>
             <tr>
                 <td style="padding: 10px;"><strong>Status:</strong></td>
@@ -166,7 +308,7 @@ def create_rejection_email(state: dict) -> tuple[str, str]:
         
         <h3 style="margin-top: 20px; color: #dc3545;">Rejection Reasons:</h3>
         <ul style="background-color: #f8d7da; padding: 15px 30px; border-radius: 5px;">
-            {errors_html}
+            $errors_html
         </ul>
         
         <p style="margin-top: 20px; color: #666;">
@@ -174,6 +316,192 @@ def create_rejection_email(state: dict) -> tuple[str, str]:
         </p>
     </body>
     </html>
+    """)
+
+_DIGEST_TMPL = string.Template("""
+    <html>
+    <body style="font-family: Arial, sans-serif; padding: 20px;">
+        <h2 style="color: #333;">Invoice Batch Summary</h2>
+        <p style="color: #666;">$approved_count approved, $rejected_count rejected</p>
+        
+        <h3 style="margin-top: 20px; color: #28a745;">Approved</h3>
+        $approved_table
+        
+        <h3 style="margin-top: 20px; color: #dc3545;">Rejected</h3>
+        $rejected_table
+    </body>
+    </html>
+    """)
+
+_DIGEST_TABLE_TMPL = string.Template("""
+        <table style="border-collapse: collapse; width: 100%; max-width: 800px;">
+            <tr>
+                <th style="padding: 10px; border-bottom: 2px solid #ddd; text-align: left;">Invoice Number</th>
+                <th style="padding: 10px; border-bottom: 2px solid #ddd; text-align: left;">Vendor</th>
+                <th style="padding: 10px; border-bottom: 2px solid #ddd; text-align: left;">Total Amount</th>
+                <th style="padding: 10px; border-bottom: 2px solid #ddd; text-align: left;">Reasons</th>
+            </tr>
+            $rows
+        </table>
+""")
+
+_DIGEST_ROW_TMPL = string.Template(
+    "<tr>"
+    "<td style='padding: 10px; border-bottom: 1px solid #ddd;'>$invoice_number</td>"
+    "<td style='padding: 10px; border-bottom: 1px solid #ddd;'>$vendor_name</td>"
+    "<td style='padding: 10px; border-bottom: 1px solid #ddd;'>$currency $total_fmt</td>"
+    "<td style='padding: 10px; border-bottom: 1px solid #ddd;'>$reasons</td>"
+    "</tr>"
+)
+
+# Maximum number of rejection reasons listed in one email
+MAX_EMAIL_ERRORS = 20
+
+# Rejection reason list item markup
+_LI_OPEN = "<li style='margin: 5px 0;'>"
+_LI_CLOSE = "</li>"
+_LI_SEP = _LI_CLOSE + _LI_OPEN
+
+
+def _error_items(errors: list) -> list[str]:
     """
+    Escape the errors listed in an email, capped at MAX_EMAIL_ERRORS.
+    
+    When errors are dropped, a final "... and K more" item says how many.
+    """
+    items = [html.escape(str(error)) for error in errors[:MAX_EMAIL_ERRORS]]
+    extra = len(errors) - len(items)
+    if extra > 0:
+        items.append(f"... and {extra} more")
+    return items
+
+
+def _total_display(state: dict) -> str:
+    """Return the formatted total, reusing the string set by the validation node."""
+    total_display = state.get("total_display")
+    if total_display is None:
+        total_display = format(state.get("total") or 0, ",.2f")
+    return total_display
+
+
+def create_approval_email(state: dict) -> tuple[str, str]:
+    """
+    Create email content for an approved invoice.
+    
+    Args:
+        state: Invoice state with extracted data
+        
+    Returns:
+        Tuple of (subject, body)
+    """
+    invoice_number = state.get("invoice_number", "Unknown")
+    vendor_name = state.get("vendor_name", "Unknown")
+    currency = state.get("currency", "USD")
+    
+    subject = f"Invoice Approved: {invoice_number} from {vendor_name}"
+    
+    body = _APPROVAL_TMPL.substitute(
+        invoice_number=html.escape(str(invoice_number)),
+        vendor_name=html.escape(str(vendor_name)),
+        currency=html.escape(str(currency)),
+        total_fmt=_total_display(state),
+    )
     
     return subject, body
+
+
+def create_rejection_email(state: dict) -> tuple[str, str]:
+    """
+    Create email content for a rejected invoice.
+    
+    Args:
+        state: Invoice state with extracted data and errors
+        
+    Returns:
+        Tuple of (subject, body)
+    """
+    invoice_number = state.get("invoice_number", "Unknown")
+    vendor_name = state.get("vendor_name", "Unknown")
+    currency = state.get("currency", "USD")
+    errors = state.get("errors", [])
+    
+    subject = f"Invoice Rejected: {invoice_number} from {vendor_name}"
+    
+    # Format errors as HTML list (capped to keep the message small)
+    items = _error_items(errors)
+    errors_html = _LI_OPEN + _LI_SEP.join(items) + _LI_CLOSE if items else ""
+    
+    body = _REJECTION_TMPL.substitute(
+        invoice_number=html.escape(str(invoice_number)),
+        vendor_name=html.escape(str(vendor_name)),
+        currency=html.escape(str(currency)),
+        total_fmt=_total_display(state),
+        errors_html=errors_html,
+    )
+    
+    return subject, body
+
+
+def _digest_table(states: list[dict]) -> str:
+    """Render one digest section as an HTML table."""
+    if not states:
+        return "<p style='color: #666;'>None</p>"
+    
+    rows = "".join(
+        _DIGEST_ROW_TMPL.substitute(
+            invoice_number=html.escape(str(state.get("invoice_number", "Unknown"))),
+            vendor_name=html.escape(str(state.get("vendor_name", "Unknown"))),
+            currency=html.escape(str(state.get("currency", "USD"))),
+            total_fmt=_total_display(state),
+            reasons="<br>".join(_error_items(state.get("errors", []))),
+        )
+        for state in states
+    )
+    return _DIGEST_TABLE_TMPL.substitute(rows=rows)
+
+
+def create_digest_email(states: list[dict]) -> tuple[str, str]:
+    """
+    Create a single summary email for a batch of processed invoices.
+    
+    Args:
+        states: Final invoice states from the workflow
+        
+    Returns:
+        Tuple of (subject, body)
+    """
+    approved = []
+    rejected = []
+    for state in states:
+        (approved if state.get("status") == "approved" else rejected).append(state)
+    
+    subject = (
+        f"Invoice Batch Summary: {len(approved)} approved, {len(rejected)} rejected"
+    )
+    
+    body = _DIGEST_TMPL.substitute(
+        approved_count=len(approved),
+        rejected_count=len(rejected),
+        approved_table=_digest_table(approved),
+        rejected_table=_digest_table(rejected),
+    )
+    
+    return subject, body
+
+
+def send_digest(states: list[dict], to_email: str | None = None) -> bool:
+    """
+    Send one summary email for a batch instead of one email per invoice.
+    
+    Args:
+        states: Final invoice states from the workflow
+        to_email: Recipient email
+        
+    Returns:
+        True if email sent successfully
+        
+    Raises:
+        EmailError: If email sending fails
+    """
+    subject, body = create_digest_email(states)
+    return send_email(subject, body, to_email)
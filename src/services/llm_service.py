@@ -1,22 +1,99 @@
 """
 LLM Service - OpenAI integration for invoice data extraction.
 """
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+import hashlib
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from src.config.settings import OPENAI_API_KEY, OPENAI_BASE_URL
+from src.config.settings import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    LLM_CACHE_PATH,
+    LLM_CACHE_DISABLED,
+)
 from src.models.invoice import InvoiceData
 
+# LangChain is imported on first use: langchain_openai pulls in the OpenAI SDK
+# and tiktoken, which CLI runs that never call the LLM should not pay for
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_openai import ChatOpenAI
+
+
+# Bump when the prompt or InvoiceData schema changes to ignore old cache entries
+EXTRACTION_CACHE_VERSION = 1
+
+# Persistent cache of extraction results, guarded by _llm_cache_lock
+_llm_cache_conn: sqlite3.Connection | None = None
+_llm_cache_lock = threading.Lock()
+
 
 class LLMExtractionError(Exception):
     """Raised when LLM extraction fails."""
     pass
 
 
-def get_llm(model: str = "gpt-4o-mini", temperature: float = 0) -> ChatOpenAI:
+def _get_cache_conn() -> sqlite3.Connection:
+    """Open the extraction cache database. Must be called with _llm_cache_lock held."""
+    global _llm_cache_conn
+    if _llm_cache_conn is None:
+        cache_dir = os.path.dirname(LLM_CACHE_PATH)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions (key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        conn.commit()
+        _llm_cache_conn = conn
+    return _llm_cache_conn
+
+
+def _extraction_cache_key(invoice_text: str) -> str:
+    """Build the cache key for an invoice text."""
+    payload = f"{EXTRACTION_CACHE_VERSION}:{invoice_text}".encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _load_cached_extraction(key: str) -> InvoiceData | None:
+    """Return a cached extraction result, or None on a miss or cache error."""
+    try:
+        with _llm_cache_lock:
+            row = _get_cache_conn().execute(
+                "SELECT data FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+        return InvoiceData.model_validate_json(row[0]) if row else None
+    except Exception:
+        # A broken or outdated cache must never block extraction
+        return None
+
+
+def _store_cached_extraction(key: str, data: InvoiceData) -> None:
+    """Persist an extraction result; cache errors are ignored."""
+    try:
+        with _llm_cache_lock:
+            conn = _get_cache_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, data) VALUES (?, ?)",
+                (key, data.model_dump_json()),
+            )
+            conn.commit()
+    except (sqlite3.Error, OSError):
+        # e.g. a read-only working directory; the extraction itself succeeded
+        pass
+
+
+@lru_cache(maxsize=8)
+def get_llm(model: str = "gpt-4o-mini", temperature: float = 0) -> "ChatOpenAI":
     """
     Create and return a configured ChatOpenAI instance.
     
+    Instances are cached per (model, temperature) so the underlying HTTP
+    connection pool is reused across invoices.
+    
     Args:
         model: OpenAI model name (default: gpt-4o-mini for cost efficiency)
         temperature: Randomness (0 = deterministic, good for extraction)
@@ -29,6 +106,8 @@ def get_llm(model: str = "gpt-4o-mini", temperature: float = 0) -> ChatOpenAI:
             "OPENAI_API_KEY not set. Please add it to your .env file."
         )
     
+    from langchain_openai import ChatOpenAI
+    
     return ChatOpenAI(
         model=model,
         temperature=temperature,
@@ -37,8 +116,8 @@ def get_llm(model: str = "gpt-4o-mini", temperature: float = 0) -> ChatOpenAI:
     )
 
 
-# Prompt template for invoice extraction
-EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+# Prompt messages for invoice extraction
+EXTRACTION_MESSAGES = [
     (
         "system",
         """You are an expert invoice data extractor. Your task is to extract 
@@ -64,13 +143,25 @@ Guidelines:
 Extract the invoice number, vendor details, customer details, dates, 
 line items, and all totals."""
     )
-])
+]
+
+
+@lru_cache(maxsize=1)
+def get_extraction_prompt() -> "ChatPromptTemplate":
+    """Build the invoice extraction prompt template (once)."""
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    return ChatPromptTemplate.from_messages(EXTRACTION_MESSAGES)
 
 
 def extract_invoice_data(invoice_text: str) -> InvoiceData:
     """
     Extract structured invoice data from raw text using LLM.
     
+    Results are cached on disk by a hash of the text (extraction runs at
+    temperature 0), so re-processing the same invoice skips the API call.
+    Set LLM_CACHE_DISABLED=1 to always call the LLM.
+    
     Args:
         invoice_text: Raw text extracted from invoice PDF
         
@@ -80,32 +171,58 @@ def extract_invoice_data(invoice_text: str) -> InvoiceData:
     Raises:
         LLMExtractionError: If extraction fails
     """
+    if not LLM_CACHE_DISABLED:
+        cache_key = _extraction_cache_key(invoice_text)
+        cached = _load_cached_extraction(cache_key)
+        if cached is not None:
+            return cached
+    
     try:
-        # Get LLM with structured output
-        llm = get_llm()
-        
-        # Create chain: prompt -> LLM with structured output
-        # with_structured_output forces the LLM to return an InvoiceData object
-        structured_llm = llm.with_structured_output(InvoiceData)
-        
-        # Create the chain
-        chain = EXTRACTION_PROMPT | structured_llm
-        
-        # Invoke the chain with invoice text
-        result = chain.invoke({"invoice_text": invoice_text})
-        
-        return result
+        # Invoke the cached chain with invoice text
+        result = get_extraction_chain().invoke({"invoice_text": invoice_text})
         
     except Exception as e:
         raise LLMExtractionError(f"Failed to extract invoice data: {e}")
+    
+    if not LLM_CACHE_DISABLED:
+        _store_cached_extraction(cache_key, result)
+    
+    return result
 
 
+@lru_cache(maxsize=1)
 def get_extraction_chain():
     """
     Get the complete extraction chain for use in LangGraph nodes.
     
     Returns a chain that can be invoked with {"invoice_text": "..."}.
+    The chain is built once and reused.
     """
     llm = get_llm()
-    structured_llm = llm.with_structured_output(InvoiceData)
-    return EXTRACTION_PROMPT | structured_llm
+    # with_structured_output forces the LLM to return an InvoiceData object.
+    # json_schema (strict) has OpenAI enforce the schema, and the OpenAI SDK
+    # validates the response with InvoiceData.model_validate_json in one pass
+    structured_llm = llm.with_structured_output(
+        InvoiceData, method="json_schema", strict=True
+    )
+    return get_extraction_prompt() | structured_llm
+
+
+def prewarm_extraction() -> bool:
+    """
+    Pay the one-off cost of the extraction path ahead of the first invoice.
+    
+    Imports LangChain, creates the client, derives the InvoiceData JSON
+    schema for structured output and builds the cached chain. Intended to
+    run at startup (ideally in a background thread) rather than at import,
+    so processes that never extract stay cheap to start.
+    
+    Returns:
+        True if the chain is ready, False if the LLM is not configured
+    """
+    try:
+        get_extraction_chain()
+    except LLMExtractionError:
+        # Missing API key; reported when the first invoice is processed
+        return False
+    return True
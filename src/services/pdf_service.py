@@ -1,9 +1,33 @@
 """
 PDF Service - Extract text from PDF invoices.
 """
-import pdfplumber
+import atexit
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import pypdfium2
 from pathlib import Path
 
+from src.config.settings import PDF_BACKEND
+
+
+# PDFs with at least this many pages are extracted in parallel worker processes
+# (pdfplumber backend only; PDFium is fast enough to stay in-process)
+PARALLEL_MIN_PAGES = 2
+
+# Upper bound on worker processes used for page extraction
+MAX_PAGE_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# Whitespace normalization patterns used by clean_text
+# (runs of 2+ spaces only; replacing a single space with itself is wasted work)
+_SPACES_RE = re.compile(r' {2,}')
+_NEWLINES_RE = re.compile(r'\n{3,}')
+
 
 class PDFExtractionError(Exception):
     """Raised when PDF text extraction fails."""
@@ -33,22 +57,186 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     if path.suffix.lower() != ".pdf":
         raise PDFExtractionError(f"File is not a PDF: {pdf_path}")
     
+    return _extract_text(pdf_path)
+
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    """
+    Extract all text content from PDF data already held in memory.
+    
+    Args:
+        pdf_bytes: Raw contents of the PDF file
+        
+    Returns:
+        Extracted text as a single string
+        
+    Raises:
+        PDFExtractionError: If the PDF cannot be read or has no text
+    """
+    if not pdf_bytes:
+        raise PDFExtractionError("PDF file is empty")
+    
+    return _extract_text(pdf_bytes)
+
+
+# Lazily created pool of page extraction workers, shared across invoices
+_page_pool: ProcessPoolExecutor | None = None
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Return the shared page extraction pool, creating it on first use."""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            # spawn: forking a process that runs server threads is unsafe
+            _page_pool = ProcessPoolExecutor(
+                max_workers=MAX_PAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _page_pool
+
+
+@atexit.register
+def _shutdown_page_pool() -> None:
+    """Stop the page extraction workers on interpreter exit."""
+    if _page_pool is not None:
+        _page_pool.shutdown(cancel_futures=True)
+
+
+# PDFium is not thread-safe: no two PDFium calls may run at the same time in
+# one process, so every pypdfium2 call below is made with this lock held
+_pdfium_lock = threading.Lock()
+
+
+def _open_pdf(source: str | bytes):
+    """Open a PDF from a path or from its raw bytes."""
+    # Imported on first use; pdfplumber loads all of pdfminer and is only
+    # needed for the fallback backend
+    import pdfplumber
+    
+    if isinstance(source, bytes):
+        return pdfplumber.open(io.BytesIO(source))
+    return pdfplumber.open(source)
+
+
+def _page_text(page) -> str:
+    """Extract the text of a pdfplumber page, skipping pages with no characters."""
+    # Image-only (scanned) pages have no chars; skip building their text layout
+    if not page.chars:
+        return ""
+    return page.extract_text() or ""
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list[str]:
+    """Extract the text of pages start..stop-1 (runs in a worker process)."""
+    with _open_pdf(pdf_path) as pdf:
+        return [_page_text(page) for page in pdf.pages[start:stop]]
+
+
+def _count_pages(source: str | bytes) -> int:
+    """Count the pages of a PDF with PDFium, without parsing any page content."""
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+def _read_pages_pdfium(pdf: pypdfium2.PdfDocument) -> list[str]:
+    """Read the text of every page of an open PDFium document. Must be called with _pdfium_lock held."""
+    if len(pdf) == 0:
+        raise PDFExtractionError("PDF has no pages")
+    
+    text_parts = [""] * len(pdf)
+    for page_index, page in enumerate(pdf):
+        textpage = page.get_textpage()
+        # Image-only (scanned) pages have no characters to read
+        if textpage.count_chars() > 0:
+            # PDFium reports line breaks as CRLF
+            text_parts[page_index] = textpage.get_text_range().replace("\r\n", "\n")
+        textpage.close()
+        page.close()
+    return text_parts
+
+
+def _extract_pages_pdfium(source: str | bytes) -> list[str]:
+    """Extract the text of every page with PDFium (native code)."""
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(source)
+        try:
+            return _read_pages_pdfium(pdf)
+        finally:
+            pdf.close()
+
+
+def _extract_pages_pdfplumber(source: str | bytes) -> list[str]:
+    """
+    Extract the text of every page with pdfplumber.
+    
+    Multi-page PDFs are split into one contiguous page range per worker
+    process, since pdfplumber's layout analysis is CPU-bound and holds the
+    GIL. Workers receive a file path rather than the PDF data, so in-memory
+    PDFs are written to a temporary file once.
+    """
+    # Check if PDF has pages
+    page_count = _count_pages(source)
+    if page_count == 0:
+        raise PDFExtractionError("PDF has no pages")
+    
+    # Small PDFs stay in-process
+    if page_count < PARALLEL_MIN_PAGES:
+        with _open_pdf(source) as pdf:
+            return [_page_text(page) for page in pdf.pages]
+    
+    if not isinstance(source, bytes):
+        return _extract_page_ranges(source, page_count)
+    
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
     try:
-        text_parts = []
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        return _extract_page_ranges(tmp_path, page_count)
+    finally:
+        os.unlink(tmp_path)
+
+
+def _extract_page_ranges(pdf_path: str, page_count: int) -> list[str]:
+    """Extract all pages of a PDF file in the worker pool, one range per worker."""
+    workers = min(MAX_PAGE_WORKERS, page_count)
+    bounds = [page_count * i // workers for i in range(workers + 1)]
+    chunks = _get_page_pool().map(
+        _extract_page_range, [pdf_path] * workers, bounds[:-1], bounds[1:]
+    )
+    return [text for chunk in chunks for text in chunk]
+
+
+def _extract_text(source: str | bytes) -> str:
+    """
+    Extract and clean the text of every page of a PDF.
+    
+    Uses PDFium by default; set PDF_BACKEND=pdfplumber to fall back to
+    pdfplumber's layout-aware extraction.
+    
+    Args:
+        source: Path to the PDF file or its raw bytes
+        
+    Returns:
+        Extracted text as a single string
         
-        with pdfplumber.open(pdf_path) as pdf:
-            # Check if PDF has pages
-            if len(pdf.pages) == 0:
-                raise PDFExtractionError("PDF has no pages")
-            
-            # Extract text from each page
-            for page_num, page in enumerate(pdf.pages, start=1):
-                page_text = page.extract_text()
-                
-                if page_text:
-                    text_parts.append(page_text)
+    Raises:
+        PDFExtractionError: If the PDF cannot be read or has no text
+    """
+    try:
+        # Extract text from each page
+        if PDF_BACKEND == "pdfplumber":
+            text_parts = _extract_pages_pdfplumber(source)
+        else:
+            text_parts = _extract_pages_pdfium(source)
         
-        # Combine all pages
+        # Combine all pages (one slot per page; the separators left by empty
+        # pages are collapsed by clean_text)
         full_text = "\n\n".join(text_parts)
         
         # Check if we extracted any text
@@ -63,7 +251,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     except Exception as e:
         if isinstance(e, PDFExtractionError):
             raise
-        if "PDFSyntaxError" in type(e).__name__:
+        if isinstance(e, pypdfium2.PdfiumError) or "PDFSyntaxError" in type(e).__name__:
             raise PDFExtractionError(f"Invalid or corrupt PDF file: {e}")
         raise PDFExtractionError(f"Failed to extract text from PDF: {e}")
 
@@ -79,11 +267,10 @@ def clean_text(text: str) -> str:
         Cleaned text with normalized whitespace
     """
     # Replace multiple spaces with single space
-    import re
-    text = re.sub(r' +', ' ', text)
+    text = _SPACES_RE.sub(' ', text)
     
     # Replace multiple newlines with double newline (paragraph break)
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = _NEWLINES_RE.sub('\n\n', text)
     
     # Strip leading/trailing whitespace
     text = text.strip()
@@ -107,10 +294,10 @@ def get_pdf_info(pdf_path: str) -> dict:
         raise PDFExtractionError(f"PDF file not found: {pdf_path}")
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            return {
-                "page_count": len(pdf.pages),
-                "file_size_kb": round(path.stat().st_size / 1024, 2),
-            }
+        page_count = _count_pages(pdf_path)
+        return {
+            "page_count": page_count,
+            "file_size_kb": round(path.stat().st_size / 1024, 2),
+        }
     except Exception as e:
         raise PDFExtractionError(f"Failed to read PDF info: {e}")
@@ -12,6 +12,7 @@ class InvoiceState(TypedDict):
     
     # INPUT
     pdf_path: str                          # Path to uploaded PDF file
+    send_notification: NotRequired[bool]   # False to skip the per-invoice email
     
     # INGEST NODE OUTPUT
     pdf_text: NotRequired[str]             # Raw text extracted from PDF
@@ -33,6 +34,7 @@ class InvoiceState(TypedDict):
     
     # VALIDATION NODE OUTPUT
     calculations_valid: NotRequired[bool]  # True if all math checks pass
+    total_display: NotRequired[str]        # Total formatted once for display, e.g. "1,234.50"
     
     # BUSINESS RULES NODE OUTPUT
     business_rules_valid: NotRequired[bool]  # True if all business rules pass
@@ -47,5 +49,6 @@ class InvoiceState(TypedDict):
     rejection_reasons: NotRequired[list[str]]  # Why invoice was rejected
     
     # NOTIFICATION
-    notification_sent: NotRequired[bool]   # True if email was sent
+    notification_sent: NotRequired[bool]   # True if email was queued for sending
+    notification_id: NotRequired[str]      # Key for polling background delivery status
     notification_error: NotRequired[str]   # Error message if email failed